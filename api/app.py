@@ -1,36 +1,289 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from flask_compress import Compress
 import pandas as pd
 import numpy as np
-from scipy import stats
 import mongomock
+import pymongo
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from datetime import datetime
+import os
+import re
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import duckdb
+except ImportError:  # only needed when OBSERVATIONS_BACKEND=duckdb
+    duckdb = None
+
 app = Flask(__name__)
+# Compress JSON responses (including streamed observations) for clients sending Accept-Encoding
+Compress(app)
 
 # Global variables to store data and database connection
-client = mongomock.MongoClient()
+# Use a real MongoDB when MONGO_URI is set, otherwise an in-memory mongomock
+if os.getenv('MONGO_URI'):
+    client = pymongo.MongoClient(os.getenv('MONGO_URI'))
+else:
+    client = mongomock.MongoClient()
 db = client.water_quality_data
 collection = db.asv_1
+
+# Backend answering /api/observations: 'mongo' (default) or 'duckdb', which
+# scans an in-memory columnar copy of the cleaned data instead
+OBSERVATIONS_BACKEND = os.getenv('OBSERVATIONS_BACKEND', 'mongo').lower()
+duck = None
 cleaned_df = None
 original_count = 0
 removed_count = 0
 
-def load_and_clean_data():
-    """Load CSV data, clean using z-score, and store in database"""
-    global cleaned_df, original_count, removed_count
+# Responses for /api/stats and /api/summary, computed once the data is loaded
+CACHED_STATS = {}
+CACHED_SUMMARY = {
+    "original_rows": 0,
+    "rows_removed": 0,
+    "rows_remaining": 0,
+    "cleaning_method": "z-score with threshold 3.0"
+}
+
+# Per-field arrays used by /api/outliers: column values in row order, the sorted
+# non-missing values, and their mean/std; plus every cleaned row as a JSON-ready dict
+FIELD_VALUES = {}
+FIELD_SORTED = {}
+FIELD_MEAN = {}
+FIELD_STD = {}
+RECORDS_JSON = []
+
+# Mappable rows (with coordinates) in time order, as served, for /api/track
+TRACK = {}
+
+# Fields returned by /api/observations
+OBSERVATION_PROJECTION = {
+    '_id': 0,
+    'timestamp': 1,
+    'latitude': 1,
+    'longitude': 1,
+    'temperature': 1,
+    'salinity': 1,
+    'odo': 1
+}
+
+# SQL and numpy equivalents of the Mongo operators /api/observations builds
+SQL_OPERATORS = {'$gte': '>=', '$lte': '<='}
+NUMPY_OPERATORS = {'$gte': np.greater_equal, '$lte': np.less_equal}
+
+# Default and maximum number of points returned by /api/track
+TRACK_DEFAULT_POINTS = 500
+TRACK_MAX_POINTS = 5000
+
+# Bytes of raw CSV parsed per record batch while loading
+READ_BLOCK_SIZE = 16 << 20
+# Records sent per insert_many call
+INSERT_BATCH_SIZE = 10_000
+# Cleaned data is cached next to the CSV as <name>.cleaned.parquet
+CLEANED_CACHE_SUFFIX = '.cleaned.parquet'
+
+def update_moments(moments, df, columns):
+    """Merge a chunk's per-column count, mean and M2 into the running moments"""
+    values = df[columns].to_numpy(dtype=np.float64)
+    n_b = len(values)
+    if n_b == 0:
+        return moments
+    mean_b = values.mean(axis=0)
+    m2_b = ((values - mean_b) ** 2).sum(axis=0)
     
-    # Load raw data - supports any CSV filename via DATA_FILE env var
-    import os
-    data_file = os.getenv('DATA_FILE', 'raw.csv')  # default to raw.csv if not set
-    print(f"Loading raw data from ../data/{data_file}...")
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(os.path.dirname(current_dir), "data", data_file)
-    df = pd.read_csv(data_path)
-    original_count = len(df)
-    print(f"Original data loaded: {original_count} rows")
+    n_a, mean_a, m2_a = moments
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (n_b / n)
+    m2 = m2_a + m2_b + delta ** 2 * (n_a * n_b / n)
+    return n, mean, m2
+
+def compute_stats(served):
+    """Summary statistics for the numeric fields of the cleaned data"""
+    numeric_columns = ['temperature', 'salinity', 'odo']
+    available_columns = [col for col in numeric_columns if col in served]
+    if not available_columns:
+        return {}
+    
+    # Describe the served float64 values, so the numbers are those of the stored
+    # readings (min/max line up with filters) at full float64 precision
+    desc = pd.DataFrame({col: served[col] for col in available_columns}).describe(
+        percentiles=[.25, .5, .75])
+    
+    # Convert to JSON-serializable format
+    stats_dict = {}
+    for col in available_columns:
+        stats_dict[col] = {
+            'count': int(desc.loc['count', col]),
+            'mean': float(desc.loc['mean', col]),
+            'std': float(desc.loc['std', col]),
+            'min': float(desc.loc['min', col]),
+            '25%': float(desc.loc['25%', col]),
+            '50%': float(desc.loc['50%', col]),
+            '75%': float(desc.loc['75%', col]),
+            'max': float(desc.loc['max', col])
+        }
+    return stats_dict
+
+def precompute_outlier_arrays(df, served):
+    """Fill the per-field outlier lookups and RECORDS_JSON from the cleaned data"""
+    for store in (FIELD_VALUES, FIELD_SORTED, FIELD_MEAN, FIELD_STD):
+        store.clear()
+    
+    for field in df.select_dtypes(include=[np.number]).columns:
+        values = df[field].to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        FIELD_VALUES[field] = values
+        FIELD_SORTED[field] = np.sort(present)
+        FIELD_MEAN[field] = present.mean() if len(present) else np.nan
+        FIELD_STD[field] = present.std() if len(present) else np.nan
+    
+    RECORDS_JSON[:] = columns_to_records(served)
+
+def precompute_track(served):
+    """Fill TRACK with time-ordered served values of the rows that have coordinates"""
+    TRACK.clear()
+    if 'latitude' not in served or 'longitude' not in served:
+        return
+    
+    fields = [field for field in OBSERVATION_PROJECTION if field != '_id' and field in served]
+    columns = {field: served[field] for field in fields}
+    row_count = len(columns['latitude'])
+    if 'timestamp' in columns:
+        # Timestamps stay ISO strings so filters compare exactly like the Mongo query
+        iso = columns.pop('timestamp')
+        has_time = iso != None
+        times = np.where(has_time, iso, '').astype(str)
+    else:
+        has_time = np.zeros(row_count, dtype=bool)
+        times = np.full(row_count, '')
+    
+    # Rows with a time first, in time order; untimed rows keep their order at the end
+    mappable = ~(np.isnan(columns['latitude']) | np.isnan(columns['longitude']))
+    order = np.lexsort((times, ~has_time))
+    order = order[mappable[order]]
+    
+    for field, values in columns.items():
+        TRACK[field] = values[order]
+    TRACK['timestamp'] = times[order]
+    TRACK['has_time'] = has_time[order]
+
+def sorted_quantile(sorted_values, q):
+    """Linearly interpolated quantile of a sorted array, matching pandas' default"""
+    position = q * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    a, b = sorted_values[lower], sorted_values[upper]
+    t = position - lower
+    # Same lerp as numpy, which keeps the result exact at both ends
+    if t < 0.5:
+        return a + (b - a) * t
+    return b - (b - a) * (1 - t)
+
+def load_duckdb(served):
+    """Register the cleaned data with an in-memory DuckDB connection"""
+    global duck
+    if duckdb is None:
+        raise RuntimeError("OBSERVATIONS_BACKEND=duckdb requires the duckdb package")
+    
+    # Same shape as the Mongo documents, plus the insertion order to sort on
+    fields = [field for field in OBSERVATION_PROJECTION if field != '_id' and field in served]
+    obs = pd.DataFrame({field: served[field] for field in fields})
+    obs['row_id'] = np.arange(len(obs))
     
+    # Copy into a native table so every per-request cursor can see it
+    duck = duckdb.connect()
+    duck.register('cleaned_obs', obs)
+    duck.execute("CREATE OR REPLACE TABLE obs AS SELECT * FROM cleaned_obs")
+    duck.unregister('cleaned_obs')
+
+def query_duckdb(query, skip, limit):
+    """Run an /api/observations Mongo-style query against DuckDB"""
+    clauses = []
+    params = []
+    for field, conditions in query.items():
+        for op, value in conditions.items():
+            clauses.append(f'"{field}" {SQL_OPERATORS[op]} ?')
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    # A cursor per request, since DuckDB connections aren't shared across threads
+    cursor = duck.cursor()
+    total_count = cursor.execute(f"SELECT count(*) FROM obs {where}", params).fetchone()[0]
+    
+    result = cursor.execute(
+        f"SELECT * EXCLUDE (row_id) FROM obs {where} ORDER BY row_id LIMIT ? OFFSET ?",
+        params + [limit, skip]
+    )
+    names = [desc[0] for desc in result.description]
+    docs = [dict(zip(names, row)) for row in result.fetchall()]
+    return total_count, docs
+
+def detect_timestamp_format(date_sample):
+    """Pick an explicit to_datetime format from a sample 'Date m/d/y' value"""
+    match = re.fullmatch(r'\s*\d{1,2}/\d{1,2}/(\d{2}|\d{4})\s*', str(date_sample))
+    if match is None:
+        return None  # fall back to pandas' format inference
+    year = '%Y' if len(match.group(1)) == 4 else '%y'
+    return f'%m/%d/{year} %H:%M:%S'
+
+def served_values(series):
+    """A column's values as stored in the database and returned by the API"""
+    if series.name == 'timestamp':
+        # Convert timestamps to strings for JSON serialization
+        return series.dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object, na_value=None)
+    values = series.to_numpy()
+    if values.dtype == np.float32:
+        # Serve float32 readings as their shortest decimal (40.6, not 40.59999847)
+        values = values.astype(str).astype(np.float64)
+    return values
+
+def served_columns(df):
+    """Every column's served values, computed once and shared by everything that
+    stores or returns the cleaned data (the float32 decimal conversion is slow)"""
+    return {col: served_values(df[col]) for col in df.columns}
+
+def columns_to_records(columns, start=0, stop=None):
+    """Convert served columns to MongoDB-ready dicts, one column at a time"""
+    values = [column[start:stop].tolist() for column in columns.values()]
+    
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+def insert_columns(columns):
+    """Insert served columns into the collection in bounded batches"""
+    inserted_count = 0
+    row_count = len(next(iter(columns.values()))) if columns else 0
+    for batch_start in range(0, row_count, INSERT_BATCH_SIZE):
+        records = columns_to_records(columns, batch_start, batch_start + INSERT_BATCH_SIZE)
+        collection.insert_many(records, ordered=False)
+        inserted_count += len(records)
+    return inserted_count
+
+def write_cleaned_cache(df, original_count, cache_path):
+    """Save the cleaned data as Parquet, with the raw row count in its metadata"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'original_count'] = str(original_count).encode()
+    pq.write_table(table.replace_schema_metadata(metadata), cache_path, compression='zstd')
+
+def read_cleaned_cache(cache_path):
+    """Load cleaned data and the raw row count saved by write_cleaned_cache"""
+    table = pq.read_table(cache_path)
+    original_count = int(table.schema.metadata[b'original_count'])
+    df = table.to_pandas()
+    if 'timestamp' in df.columns:
+        # Parquet has no seconds unit, so restore the in-memory resolution
+        df['timestamp'] = df['timestamp'].astype('datetime64[s]')
+    return df, original_count
+
+def clean_csv(data_path):
+    """Clean a raw CSV with the z-score method, inserting rows as they are cleaned.
+    Returns the cleaned frame, its served columns and the raw and inserted counts"""
     # Normalize column names and select required columns
     column_mapping = {
         'Latitude': 'latitude',
@@ -41,34 +294,155 @@ def load_and_clean_data():
         'Date m/d/y   ': 'date',
         'Time hh:mm:ss': 'time'
     }
+    column_types = {
+        'Latitude': pa.float64(),
+        'Longitude': pa.float64(),
+        'Temperature (c)': pa.float64(),
+        'Salinity (ppt)': pa.float64(),
+        'ODO mg/L': pa.float64(),
+        'Date m/d/y   ': pa.string(),
+        'Time hh:mm:ss': pa.string()
+    }
     
-    # Rename columns if they exist
-    df = df.rename(columns=column_mapping)
-    
-    # Create timestamp from date and time if available
-    if 'date' in df.columns and 'time' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['date'] + ' ' + df['time'], errors='coerce')
-    else:
-        # Create artificial timestamps if not available
-        df['timestamp'] = pd.date_range(start='2022-10-07', periods=len(df), freq='1S')
+    # Only columns that are mapped (or already carry a normalized name) are parsed
+    column_types.update({column_mapping[col]: dtype for col, dtype in column_types.items()})
+    header = pd.read_csv(data_path, nrows=0).columns
+    source_columns = [col for col in header if col in column_types]
     
-    # Select only required columns
-    required_columns = ['timestamp', 'latitude', 'longitude', 'temperature', 'salinity', 'odo']
-    available_columns = [col for col in required_columns if col in df.columns]
-    df = df[available_columns]
+    def read_chunks():
+        # Stream record batches from pyarrow's CSV reader with a fixed schema
+        reader = pacsv.open_csv(
+            data_path,
+            read_options=pacsv.ReadOptions(block_size=READ_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=source_columns,
+                column_types={col: column_types[col] for col in source_columns},
+                strings_can_be_null=True
+            )
+        )
+        yielded = False
+        for batch in reader:
+            # Rename columns if they exist
+            yield batch.to_pandas().rename(columns=column_mapping)
+            yielded = True
+        if not yielded:
+            # A header-only file has no batches; one empty chunk keeps the columns
+            yield reader.schema.empty_table().to_pandas().rename(columns=column_mapping)
     
-    # Remove rows with missing values in numeric columns
     numeric_columns = ['temperature', 'salinity', 'odo']
-    numeric_available = [col for col in numeric_columns if col in df.columns]
-    df = df.dropna(subset=numeric_available)
+    renamed_columns = [column_mapping.get(col, col) for col in source_columns]
+    numeric_available = [col for col in numeric_columns if col in renamed_columns]
     
-    print(f"After removing missing values: {len(df)} rows")
+    # First pass: running mean/variance of the numeric columns (Welford)
+    original_count = 0
+    moments = (0, 0.0, 0.0)
+    for chunk in read_chunks():
+        original_count += len(chunk)
+        # Rows with missing values are dropped before z-scoring, so skip them here too
+        chunk = chunk.dropna(subset=numeric_available)
+        moments = update_moments(moments, chunk, numeric_available)
+    print(f"Original data loaded: {original_count} rows")
+    
+    valid_count, mean, m2 = moments
+    std = np.sqrt(m2 / valid_count) if valid_count else np.zeros(len(numeric_available))
+    print(f"After removing missing values: {valid_count} rows")
+    mean_32 = np.asarray(mean, dtype=np.float32)
+    with np.errstate(divide='ignore'):
+        inv_std_32 = np.asarray(1.0 / std, dtype=np.float32)
     
-    # Clean using z-score method
+    # Second pass: clean each chunk using the z-score method and store it
     print("Applying z-score cleaning...")
-    z_scores = np.abs(stats.zscore(df[numeric_available], nan_policy='omit'))
-    mask = (z_scores < 3.0).all(axis=1)
-    cleaned_df = df[mask].copy()
+    
+    required_columns = ['timestamp', 'latitude', 'longitude', 'temperature', 'salinity', 'odo']
+    cleaned_chunks = []
+    served_chunks = []
+    inserted_count = 0
+    row_offset = 0
+    timestamp_format = None
+    for chunk in read_chunks():
+        # Create timestamp from date and time if available
+        if 'date' in chunk.columns and 'time' in chunk.columns:
+            if timestamp_format is None and chunk['date'].notna().any():
+                timestamp_format = detect_timestamp_format(chunk['date'].dropna().iloc[0])
+            chunk['timestamp'] = pd.to_datetime(
+                chunk['date'].str.cat(chunk['time'], sep=' '),
+                format=timestamp_format,
+                errors='coerce',
+                cache=True
+            )
+        else:
+            # Create artificial timestamps if not available
+            start = pd.Timestamp('2022-10-07') + pd.Timedelta(seconds=row_offset)
+            chunk['timestamp'] = pd.date_range(start=start, periods=len(chunk), freq='1s')
+        row_offset += len(chunk)
+        
+        # Select only required columns
+        available_columns = [col for col in required_columns if col in chunk.columns]
+        chunk = chunk[available_columns]
+        
+        # Clean using z-score method, working in place on a float32 array.
+        # Missing values give NaN z-scores, which fail the test as well, so this
+        # single mask also removes rows with missing values in numeric columns
+        z_scores = chunk[numeric_available].to_numpy(dtype=np.float32, copy=True)
+        z_scores -= mean_32
+        np.abs(z_scores, out=z_scores)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores *= inv_std_32
+        keep_idx = np.flatnonzero((z_scores < 3.0).all(axis=1))
+        chunk = chunk.iloc[keep_idx]
+        
+        # Sensor readings don't need float64; seconds are enough for timestamps.
+        # Latitude/longitude stay float64 for mapping precision
+        chunk = chunk.astype({col: np.float32 for col in numeric_available})
+        chunk['timestamp'] = chunk['timestamp'].astype('datetime64[s]')
+        cleaned_chunks.append(chunk)
+        
+        served_chunk = served_columns(chunk)
+        served_chunks.append(served_chunk)
+        inserted_count += insert_columns(served_chunk)
+    
+    served = {col: np.concatenate([chunk[col] for chunk in served_chunks])
+              for col in served_chunks[0]}
+    return pd.concat(cleaned_chunks, ignore_index=True), served, original_count, inserted_count
+
+def load_and_clean_data():
+    """Load CSV data, clean using z-score, and store in database"""
+    global cleaned_df, original_count, removed_count
+    
+    # Load raw data - supports any CSV filename via DATA_FILE env var
+    data_file = os.getenv('DATA_FILE', 'raw.csv')  # default to raw.csv if not set
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.path.join(os.path.dirname(current_dir), "data", data_file)
+    cache_path = os.path.splitext(data_path)[0] + CLEANED_CACHE_SUFFIX
+    
+    collection.drop()  # Clear existing data
+    
+    loaded = False
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) > os.path.getmtime(data_path):
+        # The cleaned cache is newer than the CSV, so parsing and cleaning can be skipped
+        print(f"Loading cleaned data from {cache_path}...")
+        try:
+            cleaned_df, original_count = read_cleaned_cache(cache_path)
+            loaded = True
+        except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+            print(f"Ignoring unreadable cache: {e}")
+        else:
+            served = served_columns(cleaned_df)
+            inserted_count = insert_columns(served)
+    
+    if not loaded:
+        print(f"Loading raw data from ../data/{data_file}...")
+        cleaned_df, served, original_count, inserted_count = clean_csv(data_path)
+        try:
+            write_cleaned_cache(cleaned_df, original_count, cache_path)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Could not write cleaned data cache: {e}")
+    
+    # Index the fields /api/observations filters on
+    for field in ('timestamp', 'temperature', 'salinity', 'odo'):
+        collection.create_index(field)
+    # Compound index covering the dashboard's conjunctive range filters
+    collection.create_index([('timestamp', 1), ('temperature', 1), ('salinity', 1), ('odo', 1)])
     
     removed_count = original_count - len(cleaned_df)
     
@@ -76,23 +450,74 @@ def load_and_clean_data():
     print(f"  Original rows: {original_count}")
     print(f"  Rows removed as outliers: {removed_count}")
     print(f"  Rows remaining: {len(cleaned_df)}")
+    print(f"Inserted {inserted_count} records into database")
     
-    # Insert cleaned data into database
-    print("Storing cleaned data in database...")
-    collection.drop()  # Clear existing data
+    # The cleaned data is frozen from here on, so these responses never change
+    CACHED_STATS.clear()
+    CACHED_STATS.update(compute_stats(served))
+    precompute_outlier_arrays(cleaned_df, served)
+    precompute_track(served)
+    if OBSERVATIONS_BACKEND == 'duckdb':
+        load_duckdb(served)
+    CACHED_SUMMARY.update({
+        "original_rows": original_count,
+        "rows_removed": removed_count,
+        "rows_remaining": len(cleaned_df)
+    })
+    
+    return cleaned_df
+
+def build_observation_query(args):
+    """Mongo-style query for the observation filters in the request arguments"""
+    start = args.get('start')
+    end = args.get('end')
+    min_temp = args.get('min_temp', type=float)
+    max_temp = args.get('max_temp', type=float)
+    min_sal = args.get('min_sal', type=float)
+    max_sal = args.get('max_sal', type=float)
+    min_odo = args.get('min_odo', type=float)
+    max_odo = args.get('max_odo', type=float)
     
-    # Convert DataFrame to dict for MongoDB insertion
-    records = cleaned_df.to_dict('records')
-    for record in records:
-        # Convert timestamp to string for JSON serialization
-        if pd.notna(record.get('timestamp')):
-            record['timestamp'] = record['timestamp'].isoformat()
+    # Build MongoDB query
+    query = {}
     
-    if records:
-        collection.insert_many(records)
-        print(f"Inserted {len(records)} records into database")
+    # Date range filter
+    if start or end:
+        date_filter = {}
+        if start:
+            date_filter['$gte'] = start
+        if end:
+            date_filter['$lte'] = end
+        query['timestamp'] = date_filter
     
-    return cleaned_df
+    # Temperature filter
+    if min_temp is not None or max_temp is not None:
+        temp_filter = {}
+        if min_temp is not None:
+            temp_filter['$gte'] = min_temp
+        if max_temp is not None:
+            temp_filter['$lte'] = max_temp
+        query['temperature'] = temp_filter
+    
+    # Salinity filter
+    if min_sal is not None or max_sal is not None:
+        sal_filter = {}
+        if min_sal is not None:
+            sal_filter['$gte'] = min_sal
+        if max_sal is not None:
+            sal_filter['$lte'] = max_sal
+        query['salinity'] = sal_filter
+    
+    # ODO filter
+    if min_odo is not None or max_odo is not None:
+        odo_filter = {}
+        if min_odo is not None:
+            odo_filter['$gte'] = min_odo
+        if max_odo is not None:
+            odo_filter['$lte'] = max_odo
+        query['odo'] = odo_filter
+    
+    return query
 
 @app.route("/api/health")
 def health():
@@ -103,69 +528,32 @@ def health():
 def observations():
     """Get observations with optional filters"""
     try:
-        # Get query parameters
-        start = request.args.get('start')
-        end = request.args.get('end')
-        min_temp = request.args.get('min_temp', type=float)
-        max_temp = request.args.get('max_temp', type=float)
-        min_sal = request.args.get('min_sal', type=float)
-        max_sal = request.args.get('max_sal', type=float)
-        min_odo = request.args.get('min_odo', type=float)
-        max_odo = request.args.get('max_odo', type=float)
         limit = min(request.args.get('limit', default=100, type=int), 1000)
         skip = request.args.get('skip', default=0, type=int)
+        query = build_observation_query(request.args)
         
-        # Build MongoDB query
-        query = {}
-        
-        # Date range filter
-        if start or end:
-            date_filter = {}
-            if start:
-                date_filter['$gte'] = start
-            if end:
-                date_filter['$lte'] = end
-            query['timestamp'] = date_filter
-        
-        # Temperature filter
-        if min_temp is not None or max_temp is not None:
-            temp_filter = {}
-            if min_temp is not None:
-                temp_filter['$gte'] = min_temp
-            if max_temp is not None:
-                temp_filter['$lte'] = max_temp
-            query['temperature'] = temp_filter
-        
-        # Salinity filter
-        if min_sal is not None or max_sal is not None:
-            sal_filter = {}
-            if min_sal is not None:
-                sal_filter['$gte'] = min_sal
-            if max_sal is not None:
-                sal_filter['$lte'] = max_sal
-            query['salinity'] = sal_filter
-        
-        # ODO filter
-        if min_odo is not None or max_odo is not None:
-            odo_filter = {}
-            if min_odo is not None:
-                odo_filter['$gte'] = min_odo
-            if max_odo is not None:
-                odo_filter['$lte'] = max_odo
-            query['odo'] = odo_filter
-        
-        # Execute query
-        cursor = collection.find(query, {'_id': 0}).skip(skip).limit(limit)
-        items = list(cursor)
+        if OBSERVATIONS_BACKEND == 'duckdb':
+            total_count, docs = query_duckdb(query, skip, limit)
+        else:
+            # Get total count - collection metadata is enough when unfiltered
+            if query:
+                total_count = collection.count_documents(query)
+            else:
+                total_count = collection.estimated_document_count()
+            
+            # Execute query, fetching only the fields the client uses. The page
+            # (at most 1000 documents) is read here, so a database error still
+            # becomes a 500 below instead of a truncated 200 body
+            docs = list(collection.find(query, OBSERVATION_PROJECTION).skip(skip).limit(limit))
         
-        # Get total count
-        total_count = collection.count_documents(query)
+        def generate():
+            # Stream the encoded documents; keys stay sorted like jsonify
+            yield b'{"count":%d,"items":[' % total_count
+            for i, doc in enumerate(docs):
+                yield (b',' if i else b'') + orjson.dumps(doc, option=orjson.OPT_SORT_KEYS)
+            yield b'],"returned":%d}\n' % len(docs)
         
-        return jsonify({
-            "count": total_count,
-            "returned": len(items),
-            "items": items
-        })
+        return Response(generate(), mimetype='application/json')
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -173,37 +561,13 @@ def observations():
 @app.route("/api/stats")
 def stats_endpoint():
     """Get summary statistics for numeric fields"""
-    try:
-        if cleaned_df is None:
-            return jsonify({"error": "Data not loaded"}), 500
-        
-        numeric_columns = ['temperature', 'salinity', 'odo']
-        available_columns = [col for col in numeric_columns if col in cleaned_df.columns]
-        
-        if not available_columns:
-            return jsonify({"error": "No numeric columns available"}), 500
-        
-        # Calculate statistics
-        desc = cleaned_df[available_columns].describe(percentiles=[.25, .5, .75])
-        
-        # Convert to JSON-serializable format
-        stats_dict = {}
-        for col in available_columns:
-            stats_dict[col] = {
-                'count': int(desc.loc['count', col]),
-                'mean': float(desc.loc['mean', col]),
-                'std': float(desc.loc['std', col]),
-                'min': float(desc.loc['min', col]),
-                '25%': float(desc.loc['25%', col]),
-                '50%': float(desc.loc['50%', col]),
-                '75%': float(desc.loc['75%', col]),
-                'max': float(desc.loc['max', col])
-            }
-        
-        return jsonify(stats_dict)
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    if cleaned_df is None:
+        return jsonify({"error": "Data not loaded"}), 500
+    
+    if not CACHED_STATS:
+        return jsonify({"error": "No numeric columns available"}), 500
+    
+    return jsonify(CACHED_STATS)
 
 @app.route("/api/outliers")
 def outliers():
@@ -219,36 +583,35 @@ def outliers():
         if field not in cleaned_df.columns:
             return jsonify({"error": f"Field '{field}' not found"}), 400
         
-        data = cleaned_df[field].dropna()
-        outlier_indices = []
+        if field not in FIELD_VALUES:
+            return jsonify({"error": f"Field '{field}' is not numeric"}), 400
+        
+        values = FIELD_VALUES[field]
+        sorted_values = FIELD_SORTED[field]
         
         if method == 'iqr':
             # IQR method
-            Q1 = data.quantile(0.25)
-            Q3 = data.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - k * IQR
-            upper_bound = Q3 + k * IQR
-            outlier_mask = (data < lower_bound) | (data > upper_bound)
-            outlier_indices = data[outlier_mask].index.tolist()
+            if len(sorted_values) == 0:
+                outlier_mask = np.zeros(len(values), dtype=bool)
+            else:
+                Q1 = sorted_quantile(sorted_values, 0.25)
+                Q3 = sorted_quantile(sorted_values, 0.75)
+                IQR = Q3 - Q1
+                lower_bound = Q1 - k * IQR
+                upper_bound = Q3 + k * IQR
+                outlier_mask = (values < lower_bound) | (values > upper_bound)
             
         elif method == 'zscore':
             # Z-score method
-            z_scores = np.abs(stats.zscore(data))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z_scores = np.abs((values - FIELD_MEAN[field]) / FIELD_STD[field])
             outlier_mask = z_scores > k
-            outlier_indices = data[outlier_mask].index.tolist()
         
         else:
             return jsonify({"error": "Method must be 'iqr' or 'zscore'"}), 400
         
-        # Get outlier records
-        outliers_df = cleaned_df.iloc[outlier_indices]
-        outliers_list = outliers_df.to_dict('records')
-        
-        # Convert timestamps to string
-        for record in outliers_list:
-            if 'timestamp' in record and pd.notna(record['timestamp']):
-                record['timestamp'] = record['timestamp'].isoformat()
+        # Get outlier records (NaN values never match either mask)
+        outliers_list = [RECORDS_JSON[i] for i in np.flatnonzero(outlier_mask)]
         
         return jsonify({
             "method": method,
@@ -261,15 +624,62 @@ def outliers():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/track")
+def track():
+    """Get a downsampled measurement path for the map, with the observation filters"""
+    try:
+        if cleaned_df is None:
+            return jsonify({"error": "Data not loaded"}), 500
+        
+        if not TRACK:
+            return jsonify({"error": "No coordinates available"}), 500
+        
+        max_points = request.args.get('max_points', default=TRACK_DEFAULT_POINTS, type=int)
+        max_points = max(1, min(max_points, TRACK_MAX_POINTS))
+        lat = TRACK['latitude']
+        lon = TRACK['longitude']
+        mask = np.ones(len(lat), dtype=bool)
+        
+        # Bounding box filter: min_lon,min_lat,max_lon,max_lat
+        bbox = request.args.get('bbox')
+        if bbox:
+            try:
+                min_lon, min_lat, max_lon, max_lat = [float(v) for v in bbox.split(',')]
+            except ValueError:
+                return jsonify({"error": "bbox must be 'min_lon,min_lat,max_lon,max_lat'"}), 400
+            mask &= (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        
+        # Same filters as /api/observations, evaluated on the served values
+        for field, conditions in build_observation_query(request.args).items():
+            if field not in TRACK:
+                mask[:] = False  # like Mongo, a missing field never matches
+                continue
+            if field == 'timestamp':
+                mask &= TRACK['has_time']
+            for op, value in conditions.items():
+                mask &= NUMPY_OPERATORS[op](TRACK[field], value)
+        
+        # Stride-sample evenly along the path when there are too many points
+        idx = np.flatnonzero(mask)
+        if len(idx) > max_points:
+            idx = idx[np.linspace(0, len(idx) - 1, max_points).astype(int)]
+        
+        times = TRACK['timestamp'][idx]
+        return jsonify({
+            "count": int(mask.sum()),
+            "returned": len(idx),
+            "lat": lat[idx].tolist(),
+            "lon": lon[idx].tolist(),
+            "time": np.where(TRACK['has_time'][idx], times, None).tolist()
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/summary")
 def summary():
     """Get data summary including cleaning results"""
-    return jsonify({
-        "original_rows": original_count,
-        "rows_removed": removed_count,
-        "rows_remaining": len(cleaned_df) if cleaned_df is not None else 0,
-        "cleaning_method": "z-score with threshold 3.0"
-    })
+    return jsonify(CACHED_SUMMARY)
 
 if __name__ == "__main__":
     print("Starting Flask API...")
@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, date
+import io
 import numpy as np
+from path_numba import path_distance_km  # numba-compiled when numba is installed
 
 # Configure page
 st.set_page_config(
@@ -16,16 +20,62 @@ st.set_page_config(
 # Constants
 API_BASE_URL = "http://127.0.0.1:5000/api"
 
+@st.cache_resource
+def get_session():
+    """HTTP session kept across reruns so connections to the API stay alive"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=2, backoff_factor=0.1)
+    )
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+def fetch_json(endpoint, params_key=()):
+    """GET an API endpoint and decode its JSON body"""
+    response = get_session().get(f"{API_BASE_URL}/{endpoint}", params=dict(params_key))
+    response.raise_for_status()
+    return response.json()
+
+# Streamlit reruns the whole script on every interaction, so responses are
+# reused for a while. Failures raise and are therefore never cached. Each ttl
+# needs its own decorated function: Streamlit keys a cache by the function, and
+# rebuilds it whenever the same function is cached with a different ttl
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_json_cached(endpoint, params_key=()):
+    return fetch_json(endpoint, params_key)
+
+# /api/stats never changes once the API has loaded its data
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_stats_cached():
+    return fetch_json("stats")
+
 def make_api_request(endpoint, params=None):
     """Make API request with error handling"""
+    params_key = tuple(sorted(params.items())) if params else ()
     try:
-        response = requests.get(f"{API_BASE_URL}/{endpoint}", params=params)
-        response.raise_for_status()
-        return response.json()
+        if endpoint == "health":
+            return fetch_json(endpoint, params_key)
+        if endpoint == "stats":
+            return fetch_stats_cached()
+        return fetch_json_cached(endpoint, params_key)
     except requests.exceptions.RequestException as e:
         st.error(f"API Error: {str(e)}")
         return None
 
+@st.cache_data(ttl=60, show_spinner=False)
+def export_filtered_data(params_key, fingerprint, file_format, _df):
+    """Serialize the filtered table once per filter set and dataset (_df is not
+    hashed; fingerprint stands in for its contents)"""
+    buffer = io.BytesIO()
+    if file_format == "parquet":
+        _df.to_parquet(buffer, index=False)
+    else:
+        _df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
 def main():
     st.title("🌊 Water Quality Data Dashboard")
     st.markdown("Interactive dashboard for water quality observations")
@@ -165,14 +215,24 @@ def main():
         st.subheader("📋 Filtered Observations")
         st.dataframe(df, use_container_width=True)
         
-        # Download button
-        csv = df.to_csv(index=False)
+        # Download buttons - the filtered data is determined by params plus the
+        # dataset the API has loaded, which the match count and end rows identify
+        params_key = tuple(sorted(params.items()))
+        fingerprint = (data["count"],
+                       tuple(pd.util.hash_pandas_object(df.iloc[[0, -1]], index=False).tolist()))
+        file_stem = f"water_quality_filtered_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         st.download_button(
             label="📥 Download filtered data as CSV",
-            data=csv,
-            file_name=f"water_quality_filtered_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=export_filtered_data(params_key, fingerprint, "csv", df),
+            file_name=f"{file_stem}.csv",
             mime="text/csv"
         )
+        st.download_button(
+            label="📥 Download filtered data as Parquet",
+            data=export_filtered_data(params_key, fingerprint, "parquet", df),
+            file_name=f"{file_stem}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
     
     with tab2:
         st.subheader("📈 Interactive Visualizations")
@@ -279,18 +339,24 @@ def main():
 
                 custom_data = None
                 if hover_fields:
-                    custom_df = df_sorted[hover_fields].copy()
-                    if 'timestamp' in hover_fields:
-                        custom_df['timestamp'] = custom_df['timestamp'].apply(
-                            lambda x: x.strftime('%Y-%m-%d %H:%M:%S') if pd.notnull(x) else ""
-                        )
-                    custom_data = custom_df.to_numpy()
+                    # Fill column by column; an object array keeps the numeric fields numeric
+                    # for the :.2f hover formats (np.column_stack would coerce them to strings)
+                    custom_data = np.empty((len(df_sorted), len(hover_fields)), dtype=object)
+                    for i, field in enumerate(hover_fields):
+                        if field == 'timestamp':
+                            custom_data[:, i] = df_sorted['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S').fillna("").to_numpy()
+                        else:
+                            custom_data[:, i] = df_sorted[field].to_numpy()
 
                 fig_map = go.Figure()
                 if 'timestamp' in df_sorted.columns and len(df_sorted) > 1:
+                    # Path of every matching observation, downsampled by the API
+                    track_params = {k: v for k, v in params.items() if k not in ("limit", "skip")}
+                    track_params["max_points"] = 500
+                    track = make_api_request("track", track_params)
                     fig_map.add_trace(go.Scattermapbox(
-                        lat=df_sorted['latitude'],
-                        lon=df_sorted['longitude'],
+                        lat=track["lat"] if track else df_sorted['latitude'],
+                        lon=track["lon"] if track else df_sorted['longitude'],
                         mode='lines',
                         line=dict(width=3, color='#1f77b4'),
                         name='Measurement Path',
@@ -334,8 +400,11 @@ def main():
                     **scatter_kwargs
                 ))
 
-                lat_range = df_sorted['latitude'].max() - df_sorted['latitude'].min()
-                lon_range = df_sorted['longitude'].max() - df_sorted['longitude'].min()
+                # Pull the coordinates out once for the extent, zoom and center
+                lat_arr = df_sorted['latitude'].to_numpy(dtype=np.float64)
+                lon_arr = df_sorted['longitude'].to_numpy(dtype=np.float64)
+                lat_range = float(lat_arr.max() - lat_arr.min())
+                lon_range = float(lon_arr.max() - lon_arr.min())
                 coverage = max(lat_range, lon_range)
                 zoom_level = 12
                 if coverage < 0.005:
@@ -351,8 +420,8 @@ def main():
                         style="carto-positron",
                         zoom=zoom_level,
                         center=dict(
-                            lat=float(df_sorted['latitude'].mean()),
-                            lon=float(df_sorted['longitude'].mean())
+                            lat=float(lat_arr.mean()),
+                            lon=float(lon_arr.mean())
                         )
                     ),
                     margin=dict(l=0, r=0, t=60, b=0),
@@ -366,22 +435,7 @@ def main():
                     st.metric("Total Points", len(df_sorted))
                 with col2:
                     if len(df_sorted) > 1:
-                        from math import radians, cos, sin, asin, sqrt
-
-                        def haversine(lon1, lat1, lon2, lat2):
-                            lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-                            dlon = lon2 - lon1
-                            dlat = lat2 - lat1
-                            a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-                            c = 2 * asin(sqrt(a))
-                            return 6371 * c
-
-                        total_distance = 0.0
-                        for i in range(1, len(df_sorted)):
-                            total_distance += haversine(
-                                df_sorted.iloc[i - 1]['longitude'], df_sorted.iloc[i - 1]['latitude'],
-                                df_sorted.iloc[i]['longitude'], df_sorted.iloc[i]['latitude']
-                            )
+                        total_distance = path_distance_km(np.radians(lat_arr), np.radians(lon_arr))
                         st.metric("Path Distance", f"{total_distance:.2f} km")
                     else:
                         st.metric("Path Distance", "N/A")
@@ -0,0 +1,36 @@
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the numpy version is used without it
+    njit = None
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def path_distance_km(lat, lon):
+    """Total haversine distance along a path given in radians"""
+    dlat = np.diff(lat)
+    dlon = np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    return float((2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))).sum())
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def path_distance_km(lat, lon):
+        """Total haversine distance along a path given in radians, in one fused loop"""
+        total = 0.0
+        for i in range(1, lat.shape[0]):
+            dlat = (lat[i] - lat[i - 1]) * 0.5
+            dlon = (lon[i] - lon[i - 1]) * 0.5
+            a = math.sin(dlat) ** 2 + math.cos(lat[i - 1]) * math.cos(lat[i]) * math.sin(dlon) ** 2
+            total += 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+        return total
+
+    # Compile when this module is first imported, so the first map render doesn't
+    # pay for it. Streamlit reruns the dashboard script but keeps imported modules,
+    # so this happens once per process rather than on every rerun
+    path_distance_km(np.zeros(2), np.zeros(2))
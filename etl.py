@@ -1,21 +1,145 @@
-import pandas as pd
-from scipy.stats import zscore
-import mongomock  # use MongoDB if installed
+import csv
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import mongomock
+import pymongo
+from outlier_numba import within_limits  # numba-compiled when numba is installed
 
-# Load CSV
-df = pd.read_csv("data/raw.csv")  # change filename if needed
+try:
+    from pymongoarrow.api import write as write_arrow
+except ImportError:  # optional; rows go through to_dict("records") without it
+    write_arrow = None
 
-# Clean with z-score
-z = df[["temperature", "salinity", "odo"]].apply(zscore)
-cleaned_df = df[(z.abs() <= 3).all(axis=1)]
+CSV_PATH = "data/raw.csv"  # change filename if needed
+PARQUET_PATH = "data/raw.parquet"
+SENSOR_COLUMNS = ["temperature", "salinity", "odo"]
+# Declared up front so the reader skips type inference for the sensor columns
+SENSOR_TYPES = {name: pa.float64() for name in SENSOR_COLUMNS}
+CHUNK_ROWS = 1_000_000  # peak memory is bounded by one chunk, not the whole file
+
+# Types tried for the other columns, narrowest first
+PASSTHROUGH_TYPES = [pa.bool_(), pa.int64(), pa.float64(), pa.string()]
+# Text cells read as booleans, as pandas' read_csv does (Arrow's own cast would
+# also take 0/1, which read_csv keeps as integers)
+BOOL_STRINGS = ["true", "false"]
+# Blank cells in text columns are missing values, as in pd.read_csv
+STRINGS_CAN_BE_NULL = True
+
+
+def fits(column, dtype):
+    """Whether every present value of a text column can be stored as dtype"""
+    if dtype == pa.bool_():
+        is_bool = pc.is_in(pc.utf8_lower(column), value_set=pa.array(BOOL_STRINGS))
+        return pc.all(pc.or_kleene(is_bool, pc.is_null(column))).as_py() is not False
+    try:
+        pc.cast(column, dtype)
+        return True
+    except pa.ArrowInvalid:
+        return False
+
+
+def csv_column_types(path):
+    """Column types that fit every row of the CSV, from one streaming pass.
+
+    The streaming reader otherwise infers types from its first block only, and
+    fails part-way through when a later block doesn't fit (e.g. an int column
+    that turns out to hold 100000.5)."""
+    with open(path, newline="") as f:
+        names = next(csv.reader(f))
+    # Read everything but the sensor columns as text and widen each column's type
+    # until all of its values cast to it
+    as_text = {name: pa.string() for name in names if name not in SENSOR_TYPES}
+    convert_options = pacsv.ConvertOptions(column_types={**as_text, **SENSOR_TYPES},
+                                           strings_can_be_null=STRINGS_CAN_BE_NULL)
+    rung = dict.fromkeys(as_text, 0)
+    present = dict.fromkeys(as_text, False)
+    for batch in pacsv.open_csv(path, convert_options=convert_options):
+        for name in as_text:
+            column = batch.column(name)
+            present[name] |= column.null_count < len(column)
+            while rung[name] < len(PASSTHROUGH_TYPES) - 1:
+                if fits(column, PASSTHROUGH_TYPES[rung[name]]):
+                    break
+                rung[name] += 1
+    # A column with no values at all is read as float64 NaNs, like read_csv does
+    types = {name: PASSTHROUGH_TYPES[i] if present[name] else pa.float64()
+             for name, i in rung.items()}
+    return {**types, **SENSOR_TYPES}
 
-# Report
-print("Original rows:", len(df))
-print("Removed outliers:", len(df) - len(cleaned_df))
-print("Remaining rows:", len(cleaned_df))
 
-# Insert into mongomock
-client = mongomock.MongoClient()
+# Convert the CSV to Parquet once (and again whenever the CSV changes), streaming
+# it block by block so later runs load columns directly instead of re-parsing text.
+# The file is written under a temporary name and only replaces PARQUET_PATH once
+# complete, so a failed conversion never leaves a partial table that looks current
+if not os.path.exists(PARQUET_PATH) or os.path.getmtime(PARQUET_PATH) < os.path.getmtime(CSV_PATH):
+    convert_options = pacsv.ConvertOptions(column_types=csv_column_types(CSV_PATH),
+                                           strings_can_be_null=STRINGS_CAN_BE_NULL)
+    reader = pacsv.open_csv(CSV_PATH, convert_options=convert_options)
+    partial_path = PARQUET_PATH + ".partial"
+    try:
+        with pq.ParquetWriter(partial_path, reader.schema, compression="zstd") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        os.replace(partial_path, PARQUET_PATH)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+parquet = pq.ParquetFile(PARQUET_PATH)
+
+# Pass 1: merge per-chunk count/mean/M2 so the z-score uses whole-dataset moments
+# (population std, as scipy.stats.zscore); only the sensor columns are read
+n, mu, m2 = 0, np.zeros(len(SENSOR_COLUMNS)), np.zeros(len(SENSOR_COLUMNS))
+for batch in parquet.iter_batches(batch_size=CHUNK_ROWS, columns=SENSOR_COLUMNS):
+    values = batch.to_pandas().to_numpy(dtype=np.float64)
+    n_b = len(values)
+    if n_b == 0:
+        continue
+    mean_b = values.mean(axis=0)
+    delta = mean_b - mu
+    total = n + n_b
+    m2 = m2 + ((values - mean_b) ** 2).sum(axis=0) + delta ** 2 * (n * n_b / total)
+    mu = mu + delta * (n_b / total)
+    n = total
+limit = 3 * np.sqrt(m2 / n)
+
+# Pass 2: clean each chunk against those moments and insert it straight away.
+# Use a real MongoDB when MONGO_URI is set, otherwise an in-memory mongomock
+if os.getenv("MONGO_URI"):
+    client = pymongo.MongoClient(os.getenv("MONGO_URI"))
+else:
+    client = mongomock.MongoClient()
 db = client["water_quality_data"]
 collection = db["asv_1"]
-collection.insert_many(cleaned_df.to_dict("records"))
+# pymongoarrow encodes Arrow tables straight to BSON, skipping the per-row dicts;
+# it needs a real pymongo collection, so the mock keeps the dict path
+arrow_writes = write_arrow is not None and isinstance(collection, pymongo.collection.Collection)
+
+original_count = 0
+remaining_count = 0
+for batch in parquet.iter_batches(batch_size=CHUNK_ROWS):
+    arr = batch.select(SENSOR_COLUMNS).to_pandas().to_numpy(dtype=np.float32)
+    keep = np.flatnonzero(within_limits(arr, mu.astype(np.float32), limit.astype(np.float32)))
+    cleaned_batch = batch.take(keep)
+    original_count += batch.num_rows
+    remaining_count += cleaned_batch.num_rows
+    if not cleaned_batch.num_rows:
+        continue
+    if arrow_writes:
+        write_arrow(collection, pa.Table.from_batches([cleaned_batch]))
+    else:
+        chunk = cleaned_batch.to_pandas()
+        # Arrow hands back missing booleans as None; read_csv gives NaN
+        for name in chunk.columns:
+            if cleaned_batch.schema.field(name).type == pa.bool_() and chunk[name].hasnans:
+                chunk[name] = chunk[name].where(chunk[name].notna(), np.nan)
+        collection.insert_many(chunk.to_dict("records"), ordered=False)
+
+# Report
+print("Original rows:", original_count)
+print("Removed outliers:", original_count - remaining_count)
+print("Remaining rows:", remaining_count)
@@ -1,38 +1,72 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, request
+import hashlib
+import orjson
 import pandas as pd
 
 app = Flask(__name__)
 
-df = pd.read_csv("datasets/cars.csv")
+# /cars returns every column, so all are read; the ones the routes use get explicit types
+CAR_DTYPES = {"CarName": "string[pyarrow]", "carbody": "string[pyarrow]", "price": "float64"}
+df = pd.read_csv("datasets/cars.csv", dtype=CAR_DTYPES)
 # print(df.head())
 # print(df.columns)
 
+def serialize(obj):
+    """Encode a payload with orjson in jsonify's layout (compact, sorted keys,
+    trailing newline), so it can be built once and reused"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS
+                        | orjson.OPT_APPEND_NEWLINE)
+
+# df never changes after loading, so every route's body is computed at import
+INDEX_JSON = serialize({
+    "routes":{
+        "/cars": "First 10 rows of all cars",
+        "/cars/makes": "List of all unique car makes",
+        "/cars/bodies": "List of all unique car bodies",
+        "/cars/prices": "First 10 rows showing car name & price"
+    }
+})
+CARS_JSON = serialize(df.head(10).to_dict(orient="records"))
+MAKES_JSON = serialize(df["CarName"].str.extract(r"^(\S+)", expand=False).unique().tolist())
+BODIES_JSON = serialize(df["carbody"].unique().tolist())
+PRICES_JSON = serialize(df[["CarName","price"]].head(10).to_dict(orient="records"))
+
+# The bodies never change while the app runs, so each one gets a fixed ETag and
+# clients that already hold it get a bodyless 304 back
+ETAGS = {body: hashlib.blake2b(body, digest_size=16).hexdigest()
+         for body in (INDEX_JSON, CARS_JSON, MAKES_JSON, BODIES_JSON, PRICES_JSON)}
+
+def json_response(body):
+    response = Response(body, mimetype="application/json")
+    response.set_etag(ETAGS[body])
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
 @app.route("/")
 def index():
-    return jsonify({
-        "routes":{
-            "/cars": "First 10 rows of all cars",
-            "/cars/makes": "List of all unique car makes",
-            "/cars/bodies": "List of all unique car bodies",
-            "/cars/prices": "First 10 rows showing car name & price"
-        }
-    })
+    return json_response(INDEX_JSON)
 
 @app.route("/cars")
 def cars():
-    return jsonify(df.head(10).to_dict(orient="records"))
+    return json_response(CARS_JSON)
 
 @app.route("/cars/makes")
 def cars_makes():
-    return jsonify(df["CarName"].str.split().str[0].unique().tolist())
+    return json_response(MAKES_JSON)
 
 @app.route("/cars/bodies")
 def cars_bodies():
-    return jsonify(df["carbody"].unique().tolist())
+    return json_response(BODIES_JSON)
 
 @app.route("/cars/prices")
 def cars_prices():
-    return jsonify(df[["CarName","price"]].head(10).to_dict(orient="records"))
+    return json_response(PRICES_JSON)
 
+# `python flaskWebApp3.py` starts the single-threaded development server. To serve
+# requests concurrently, run it under gunicorn (pip install gunicorn) instead:
+#   gunicorn -w $(nproc) -k gthread --threads 4 -b 127.0.0.1:5050 --preload flaskWebApp3:app
+# --preload imports this module once in the master, so cars.csv is read and the
+# payloads above are built once and shared by every worker
 if __name__ == '__main__':
     app.run(debug=True, port=5050)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; the numpy version is used without it
+    njit = None
+
+
+def within_limits(arr, mu, limit):
+    """Boolean row mask keeping rows with |x - mu| <= limit in every column, for
+    chunks cleaned against moments computed over the whole dataset"""
+    # Compare squares so one deviation array is reused in place instead of
+    # allocating another for abs()
+    deviation = arr - mu
+    np.multiply(deviation, deviation, out=deviation)
+    return (deviation <= limit * limit).all(axis=1)
+
+
+if njit is not None:
+    # Every fastmath flag except nnan/ninf, so a NaN still fails the comparison
+    # and drops its row the same way the numpy version does
+    FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+    @njit(parallel=True, cache=True, fastmath=FASTMATH)
+    def within_limits(arr, mu, limit):
+        """Boolean row mask keeping rows with |x - mu| <= limit in every column,
+        in a parallel loop over rows"""
+        n_rows, n_cols = arr.shape
+        mask = np.empty(n_rows, dtype=np.bool_)
+        for i in prange(n_rows):
+            keep = True
+            for j in range(n_cols):
+                if not abs(arr[i, j] - mu[j]) <= limit[j]:
+                    keep = False
+                    break
+            mask[i] = keep
+        return mask